@@ -1,14 +1,16 @@
 import tkinter as tk
 from tkinter import messagebox, filedialog, ttk
-from PIL import Image, ImageTk
 import sqlite3
-import os
 import hashlib
 import hmac
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_NAME = os.path.join(BASE_DIR, "healthcare.db")
+from database import get_conn
+from image_cache import load_icon
+
+# One migration ladder for the shared PRAGMA user_version lives in the staff app.
+from billing_staff_app import ensure_schema
 
 # --- Dashboard style palette ---
 BG_LIGHT = "#e6f2ec"
@@ -27,44 +29,43 @@ FONT_SMALL = ("Helvetica", 9)
 FONT_BTN = ("Helvetica", 10, "bold")
 
 
+# Stored-hash prefix -> hashlib digest for the PBKDF2 formats. New hashes
+# are scrypt; pbkdf2 rows written before the switch still verify.
+_PBKDF2_DIGESTS = {
+    "pbkdf2_sha256": "sha256",
+    "pbkdf2_sha512": "sha512",
+}
+
+
+# Login checks run here, one at a time, off the Tk thread.
+_verify_pool = ThreadPoolExecutor(max_workers=1)
+
+
 def verify_password(password: str, stored_hash: str) -> bool:
     try:
-        algo, iterations, salt_hex, hash_hex = stored_hash.split("$")
-        if algo != "pbkdf2_sha256":
-            return False
-        dk = hashlib.pbkdf2_hmac(
-            "sha256",
-            password.encode("utf-8"),
-            bytes.fromhex(salt_hex),
-            int(iterations)
-        )
+        algo, *params, salt_hex, hash_hex = stored_hash.split("$")
+        salt = bytes.fromhex(salt_hex)
+        if algo == "scrypt":
+            n, r, p = (int(x) for x in params)
+            dk = hashlib.scrypt(
+                password.encode("utf-8"),
+                salt=salt, n=n, r=r, p=p, dklen=len(hash_hex) // 2
+            )
+        else:
+            digest = _PBKDF2_DIGESTS.get(algo)
+            if digest is None or len(params) != 1:
+                return False
+            dk = hashlib.pbkdf2_hmac(
+                digest,
+                password.encode("utf-8"),
+                salt,
+                int(params[0])
+            )
         return hmac.compare_digest(dk.hex(), hash_hex)
     except Exception:
         return False
 
 
-def ensure_patient_password_column(conn):
-    cols = [row[1] for row in conn.execute("PRAGMA table_info(Patient)").fetchall()]
-    if "password_hash" not in cols:
-        conn.execute("ALTER TABLE Patient ADD COLUMN password_hash TEXT")
-
-
-def ensure_bill_payment_columns(conn):
-    cols = [row[1] for row in conn.execute("PRAGMA table_info(Bill)").fetchall()]
-    if "paid_date" not in cols:
-        conn.execute("ALTER TABLE Bill ADD COLUMN paid_date TEXT")
-    if "payment_method_id" not in cols:
-        conn.execute("ALTER TABLE Bill ADD COLUMN payment_method_id INTEGER")
-    if "receipt_number" not in cols:
-        conn.execute("ALTER TABLE Bill ADD COLUMN receipt_number TEXT")
-
-
-def ensure_schema(conn):
-    ensure_patient_password_column(conn)
-    ensure_bill_payment_columns(conn)
-    conn.commit()
-
-
 def generate_receipt_number(bill_id: int) -> str:
     return f"RCPT-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{bill_id}"
 
@@ -75,8 +76,7 @@ class BillingFrame(tk.Frame):
         self.controller = controller
         self.back_command = back_command
 
-        self.conn = None
-        self._reconnect_db()
+        self.conn = get_conn(foreign_keys=False)
         ensure_schema(self.conn)
 
         self.logged_in_patient_id = None
@@ -85,6 +85,7 @@ class BillingFrame(tk.Frame):
 
         # Patient picker state (mirrors staff billing pattern)
         self.patient_map = {}
+        self.patient_labels = {}
         self.selected_patient_id = None
 
         self.login_frame = None
@@ -95,14 +96,6 @@ class BillingFrame(tk.Frame):
 
         self._build_login_ui()
 
-    def _reconnect_db(self):
-        try:
-            if self.conn:
-                self.conn.close()
-        except Exception:
-            pass
-        self.conn = sqlite3.connect(DB_NAME, timeout=5)
-
     def _db(self):
         return self.conn
 
@@ -127,13 +120,6 @@ class BillingFrame(tk.Frame):
         ).pack(anchor="w")
 
         # Load sidebar icons (same as clinic_location.py)
-        def load_icon(path, size=(18, 20)):
-            try:
-                img = Image.open(path).resize(size, Image.LANCZOS)
-                return ImageTk.PhotoImage(img)
-            except Exception:
-                return None
-
         if not hasattr(self, "_sidebar_icons"):
             self._sidebar_icons = {
                 "Dashboard": load_icon("icons/dashboard_icon.png"),
@@ -233,7 +219,7 @@ class BillingFrame(tk.Frame):
             padx=30, pady=(4, 14)
         )
 
-        tk.Button(
+        self.login_btn = tk.Button(
             card,
             text="Login",
             bg=BG_SIDEBAR,
@@ -243,10 +229,10 @@ class BillingFrame(tk.Frame):
             padx=18,
             pady=8,
             command=self.login_patient
-        ).pack()
+        )
+        self.login_btn.pack()
 
     def login_patient(self):
-        self._reconnect_db()
 
         email = self.email_var.get().strip()
         password = self.password_var.get()
@@ -267,7 +253,36 @@ class BillingFrame(tk.Frame):
 
         patient_id, first_name, last_name, stored_hash = row
 
-        if not stored_hash or not verify_password(password, stored_hash):
+        if not stored_hash:
+            messagebox.showerror("Login failed", "Incorrect password.")
+            return
+
+        self._verify_in_background(
+            password, stored_hash,
+            lambda ok: self._finish_login(ok, patient_id, first_name, last_name))
+
+    def _verify_in_background(self, password, stored_hash, on_done):
+        """Run verify_password on a worker thread (hashlib KDFs release the GIL)
+        and pass the result to on_done back on the Tk thread.
+
+        The poll is scheduled on the toplevel: navigating away destroys this
+        frame, which would delete a timer registered on it. If the frame is
+        gone by the time the check finishes, the login is dropped."""
+        self.login_btn.config(state="disabled")
+        fut = _verify_pool.submit(verify_password, password, stored_hash)
+        root = self.winfo_toplevel()
+
+        def poll():
+            if not fut.done():
+                root.after(20, poll)
+            elif self.winfo_exists():
+                self.login_btn.config(state="normal")
+                on_done(fut.result())
+
+        root.after(20, poll)
+
+    def _finish_login(self, ok, patient_id, first_name, last_name):
+        if not ok:
             messagebox.showerror("Login failed", "Incorrect password.")
             return
 
@@ -452,22 +467,20 @@ class BillingFrame(tk.Frame):
             ORDER BY last_name, first_name
         """).fetchall()
 
-        self.patient_map.clear()
-        display = []
-        for pid, fn, ln, email in rows:
-            label = f"{ln}, {fn}  (ID {pid})" + (f"  <{email}>" if email else "")
-            self.patient_map[label] = pid
-            display.append(label)
-
-        self.patient_picker_combo["values"] = display
+        self.patient_map = {
+            f"{ln}, {fn}  (ID {pid})" + (f"  <{email}>" if email else ""): pid
+            for pid, fn, ln, email in rows
+        }
+        self.patient_labels = {pid: label for label, pid in self.patient_map.items()}
+        self.patient_picker_combo["values"] = list(self.patient_map)
 
     def _select_patient_by_id(self, patient_id: int):
         """Set the picker to a specific patient_id and load their data."""
-        for label, pid in self.patient_map.items():
-            if pid == patient_id:
-                self.viewing_patient_var.set(label)
-                self.selected_patient_id = patient_id
-                return
+        label = self.patient_labels.get(patient_id)
+        if label is not None:
+            self.viewing_patient_var.set(label)
+            self.selected_patient_id = patient_id
+            return
         # Fallback: just use the logged-in patient
         self.selected_patient_id = patient_id
 
@@ -486,7 +499,6 @@ class BillingFrame(tk.Frame):
 
     def _load_payment_methods(self):
         """Load payment methods for the *currently viewed* patient."""
-        self.payment_method_map.clear()
         rows = self._db().cursor().execute("""
             SELECT payment_method_id, type, last4, exp_month, exp_year, active_flag
             FROM PaymentMethod
@@ -494,12 +506,12 @@ class BillingFrame(tk.Frame):
             ORDER BY active_flag DESC, payment_method_id DESC
         """, (self.selected_patient_id,)).fetchall()
 
-        display = []
-        for pmid, typ, last4, mm, yy, active in rows:
-            active_txt = "ACTIVE" if active else "inactive"
-            label = f"{typ or 'method'} ****{last4 or '????'}  exp {mm}/{yy}  ({active_txt})  [PM {pmid}]"
-            self.payment_method_map[label] = pmid
-            display.append(label)
+        self.payment_method_map = {
+            f"{typ or 'method'} ****{last4 or '????'}  exp {mm}/{yy}  "
+            f"({'ACTIVE' if active else 'inactive'})  [PM {pmid}]": pmid
+            for pmid, typ, last4, mm, yy, active in rows
+        }
+        display = list(self.payment_method_map)
 
         self.pm_combo["values"] = display
         if display:
@@ -509,8 +521,7 @@ class BillingFrame(tk.Frame):
 
     def _load_bills(self):
         """Load bills for the *currently viewed* patient."""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.tree.delete(*self.tree.get_children())
 
         rows = self._db().cursor().execute("""
             SELECT
@@ -555,7 +566,6 @@ class BillingFrame(tk.Frame):
         self.pm_card.config(text=f"Payment Methods\n{len(self.payment_method_map)}")
 
     def refresh(self):
-        self._reconnect_db()
         if self.selected_patient_id is None:
             self.selected_patient_id = self.logged_in_patient_id
         self._load_payment_methods()
@@ -646,18 +656,17 @@ class BillingFrame(tk.Frame):
             last4 = card_number[-4:]
 
             try:
-                self._reconnect_db()
-                cur = self._db().cursor()
-                if active_flag == 1:
-                    cur.execute(
-                        "UPDATE PaymentMethod SET active_flag = 0 WHERE patient_id = ?",
-                        (self.selected_patient_id,)
-                    )
-                cur.execute("""
-                    INSERT INTO PaymentMethod (patient_id, type, last4, exp_month, exp_year, active_flag)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (self.selected_patient_id, pm_type, last4, int(exp_month), int(exp_year), active_flag))
-                self._db().commit()
+                with self._db() as conn:
+                    cur = conn.cursor()
+                    if active_flag == 1:
+                        cur.execute(
+                            "UPDATE PaymentMethod SET active_flag = 0 WHERE patient_id = ?",
+                            (self.selected_patient_id,)
+                        )
+                    cur.execute("""
+                        INSERT INTO PaymentMethod (patient_id, type, last4, exp_month, exp_year, active_flag)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (self.selected_patient_id, pm_type, last4, int(exp_month), int(exp_year), active_flag))
             except sqlite3.Error as e:
                 messagebox.showerror("Database Error", f"Could not add payment method.\n\n{e}")
                 return
@@ -697,12 +706,11 @@ class BillingFrame(tk.Frame):
             return
 
         try:
-            self._reconnect_db()
-            self._db().execute("""
-                DELETE FROM PaymentMethod
-                WHERE payment_method_id = ? AND patient_id = ?
-            """, (payment_method_id, self.selected_patient_id))
-            self._db().commit()
+            with self._db() as conn:
+                conn.execute("""
+                    DELETE FROM PaymentMethod
+                    WHERE payment_method_id = ? AND patient_id = ?
+                """, (payment_method_id, self.selected_patient_id))
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Could not remove payment method.\n\n{e}")
             return
@@ -733,13 +741,12 @@ class BillingFrame(tk.Frame):
         receipt_number = generate_receipt_number(bill_id)
         paid_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        self._reconnect_db()
-        self._db().execute("""
-            UPDATE Bill
-            SET status = 'paid', paid_date = ?, payment_method_id = ?, receipt_number = ?
-            WHERE bill_id = ?
-        """, (paid_date, payment_method_id, receipt_number, bill_id))
-        self._db().commit()
+        with self._db() as conn:
+            conn.execute("""
+                UPDATE Bill
+                SET status = 'paid', paid_date = ?, payment_method_id = ?, receipt_number = ?
+                WHERE bill_id = ?
+            """, (paid_date, payment_method_id, receipt_number, bill_id))
 
         self.refresh()
         messagebox.showinfo("Success", f"Bill #{bill_id} marked as paid.")
@@ -753,7 +760,6 @@ class BillingFrame(tk.Frame):
         values = self.tree.item(sel[0], "values")
         bill_id = int(values[0])
 
-        self._reconnect_db()
         row = self._db().cursor().execute("""
             SELECT
                 b.bill_id, b.amount, b.due_date, b.status, b.created_at, b.paid_date,
@@ -784,11 +790,11 @@ class BillingFrame(tk.Frame):
 
         if not receipt_number:
             receipt_number = generate_receipt_number(bill_id)
-            self._db().execute(
-                "UPDATE Bill SET receipt_number = ? WHERE bill_id = ?",
-                (receipt_number, bill_id)
-            )
-            self._db().commit()
+            with self._db() as conn:
+                conn.execute(
+                    "UPDATE Bill SET receipt_number = ? WHERE bill_id = ?",
+                    (receipt_number, bill_id)
+                )
 
         receipt_text = (
             "CareFlow Payment Receipt\n"
@@ -1,13 +1,17 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
 import sqlite3
 import os
 import hashlib
 import hmac
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import logging
 
-DB_NAME = "healthcare.db"
+from database import get_conn, create_patient_email_index, create_staff_email_index
+from image_cache import load_icon
+
+log = logging.getLogger(__name__)
 
 BG_LIGHT = "#e6f2ec"
 BG_SIDEBAR = "#5FAF90"
@@ -33,47 +37,115 @@ BILLING_TEMPLATES = {
 }
 
 
+# Stored-hash prefix -> hashlib digest for the PBKDF2 formats. New hashes
+# are scrypt; pbkdf2 rows written before the switch still verify.
+_PBKDF2_DIGESTS = {
+    "pbkdf2_sha256": "sha256",
+    "pbkdf2_sha512": "sha512",
+}
+
+
+# Login checks run here, one at a time, off the Tk thread.
+_verify_pool = ThreadPoolExecutor(max_workers=1)
+
+
 def verify_password(password: str, stored_hash: str) -> bool:
     try:
-        algo, iterations, salt_hex, hash_hex = stored_hash.split("$")
-        if algo != "pbkdf2_sha256":
-            return False
-        dk = hashlib.pbkdf2_hmac(
-            "sha256",
-            password.encode("utf-8"),
-            bytes.fromhex(salt_hex),
-            int(iterations)
-        )
+        algo, *params, salt_hex, hash_hex = stored_hash.split("$")
+        salt = bytes.fromhex(salt_hex)
+        if algo == "scrypt":
+            n, r, p = (int(x) for x in params)
+            dk = hashlib.scrypt(
+                password.encode("utf-8"),
+                salt=salt, n=n, r=r, p=p, dklen=len(hash_hex) // 2
+            )
+        else:
+            digest = _PBKDF2_DIGESTS.get(algo)
+            if digest is None or len(params) != 1:
+                return False
+            dk = hashlib.pbkdf2_hmac(
+                digest,
+                password.encode("utf-8"),
+                salt,
+                int(params[0])
+            )
         return hmac.compare_digest(dk.hex(), hash_hex)
     except Exception:
         return False
 
 
+def _add_column(conn, table, column, decl):
+    """ALTER in a new column, treating SQLite's duplicate-column error as done."""
+    try:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    except sqlite3.OperationalError as e:
+        if "duplicate column" not in str(e):
+            raise
+
+
+def ensure_patient_password_column(conn):
+    _add_column(conn, "Patient", "password_hash", "TEXT")
+
+
 def ensure_staff_password_column(conn):
-    cols = [row[1] for row in conn.execute("PRAGMA table_info(Staff)").fetchall()]
-    if "password_hash" not in cols:
-        conn.execute("ALTER TABLE Staff ADD COLUMN password_hash TEXT")
+    _add_column(conn, "Staff", "password_hash", "TEXT")
 
 
 def ensure_bill_payment_columns(conn):
-    cols = [row[1] for row in conn.execute("PRAGMA table_info(Bill)").fetchall()]
-    if "paid_date" not in cols:
-        conn.execute("ALTER TABLE Bill ADD COLUMN paid_date TEXT")
-    if "payment_method_id" not in cols:
-        conn.execute("ALTER TABLE Bill ADD COLUMN payment_method_id INTEGER")
-    if "receipt_number" not in cols:
-        conn.execute("ALTER TABLE Bill ADD COLUMN receipt_number TEXT")
+    _add_column(conn, "Bill", "paid_date", "TEXT")
+    _add_column(conn, "Bill", "payment_method_id", "INTEGER")
+    _add_column(conn, "Bill", "receipt_number", "TEXT")
+
+
+def ensure_email_indexes(conn):
+    # Both logins look accounts up with LOWER(email) = LOWER(?).
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_patient_email_lower ON Patient(LOWER(email))")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_staff_email_lower ON Staff(LOWER(email))")
+
+
+def ensure_unique_emails(conn):
+    # database.py owns these indexes and logs which table is blocked by
+    # duplicates; the patient and staff pages create them as well.
+    patient_ok = create_patient_email_index(conn)
+    staff_ok = create_staff_email_index(conn)
+    return patient_ok and staff_ok
+
+
+# The only migration ladder for PRAGMA user_version; billing_patient_app
+# imports ensure_schema from here rather than keeping its own copy.
+SCHEMA_VERSION = 3
 
 
 def ensure_schema(conn):
-    ensure_staff_password_column(conn)
-    ensure_bill_payment_columns(conn)
-    conn.commit()
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    # Every step and the version bump commit together (or not at all); the
+    # version is re-read under the write lock in case another window won.
+    conn.execute("BEGIN IMMEDIATE")
+    with conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            ensure_patient_password_column(conn)
+            ensure_staff_password_column(conn)
+            ensure_bill_payment_columns(conn)
+        if version < 2:
+            ensure_email_indexes(conn)
+        target = SCHEMA_VERSION
+        if version < 3 and not ensure_unique_emails(conn):
+            # Stop at v2 so the unique indexes are retried on the next start.
+            log.warning("Schema left at version 2 until duplicate emails are resolved")
+            target = 2
+        if version < target:
+            conn.execute(f"PRAGMA user_version = {target}")
 
 
 def is_valid_date_yyyy_mm_dd(s: str) -> bool:
+    # fromisoformat also takes 20250131 and week dates on 3.11+, so pin the
+    # YYYY-MM-DD shape first.
+    if len(s) != 10 or s[4] != "-" or s[7] != "-":
+        return False
     try:
-        datetime.strptime(s, "%Y-%m-%d")
+        date.fromisoformat(s)
         return True
     except ValueError:
         return False
@@ -84,13 +156,16 @@ class BillingFrame(tk.Frame):
         super().__init__(parent, bg=BG_LIGHT)
         self.controller = controller
         self.role = role
-        self.conn = sqlite3.connect(DB_NAME)
+        self.conn = get_conn(foreign_keys=False)
         ensure_schema(self.conn)
 
         self.logged_in_staff_id = None
         self.logged_in_staff_name = ""
-        self.patient_map = {}
-        self.location_map = {}
+        # Parallel to the combobox values, so current() indexes straight in.
+        self.patient_ids = []
+        self.patient_loc_ids = []
+        self.location_ids = []
+        self.location_index = {}
         self.login_frame = None
         self.app_frame = None
         self.tree = None
@@ -128,13 +203,6 @@ class BillingFrame(tk.Frame):
         ).pack(anchor="w")
 
         # Load sidebar icons (same as clinic_location.py)
-        def load_icon(path, size=(18, 20)):
-            try:
-                img = Image.open(path).resize(size, Image.LANCZOS)
-                return ImageTk.PhotoImage(img)
-            except Exception:
-                return None
-
         if not hasattr(self, "_sidebar_icons"):
             self._sidebar_icons = {
                 "Dashboard": load_icon("icons/dashboard_icon.png"),
@@ -236,10 +304,11 @@ class BillingFrame(tk.Frame):
         self.password_var = tk.StringVar()
         tk.Entry(card, textvariable=self.password_var, show="*", width=34, bd=1, relief="solid").pack(padx=30, pady=(4, 14))
 
-        tk.Button(
+        self.login_btn = tk.Button(
             card, text="Login", bg=BG_SIDEBAR, fg=TEXT, font=FONT_BTN,
             relief="flat", padx=18, pady=8, command=self.login_staff
-        ).pack()
+        )
+        self.login_btn.pack()
 
     def login_staff(self):
         email = self.email_var.get().strip()
@@ -265,7 +334,36 @@ class BillingFrame(tk.Frame):
             messagebox.showerror("Login failed", "This staff account is inactive.")
             return
 
-        if not stored_hash or not verify_password(password, stored_hash):
+        if not stored_hash:
+            messagebox.showerror("Login failed", "Incorrect password.")
+            return
+
+        self._verify_in_background(
+            password, stored_hash,
+            lambda ok: self._finish_login(ok, staff_id, first_name, last_name, role))
+
+    def _verify_in_background(self, password, stored_hash, on_done):
+        """Run verify_password on a worker thread (hashlib KDFs release the GIL)
+        and pass the result to on_done back on the Tk thread.
+
+        The poll is scheduled on the toplevel: navigating away destroys this
+        frame, which would delete a timer registered on it. If the frame is
+        gone by the time the check finishes, the login is dropped."""
+        self.login_btn.config(state="disabled")
+        fut = _verify_pool.submit(verify_password, password, stored_hash)
+        root = self.winfo_toplevel()
+
+        def poll():
+            if not fut.done():
+                root.after(20, poll)
+            elif self.winfo_exists():
+                self.login_btn.config(state="normal")
+                on_done(fut.result())
+
+        root.after(20, poll)
+
+    def _finish_login(self, ok, staff_id, first_name, last_name, role):
+        if not ok:
             messagebox.showerror("Login failed", "Incorrect password.")
             return
 
@@ -422,12 +520,10 @@ class BillingFrame(tk.Frame):
             FROM Patient ORDER BY last_name, first_name
         """).fetchall()
 
-        self.patient_map.clear()
-        display = []
-        for pid, fn, ln, email, _loc_id in rows:
-            label = f"{ln}, {fn}  (ID {pid})" + (f"  <{email}>" if email else "")
-            self.patient_map[label] = pid
-            display.append(label)
+        display = [f"{ln}, {fn}  (ID {pid})" + (f"  <{email}>" if email else "")
+                   for pid, fn, ln, email, _loc_id in rows]
+        self.patient_ids = [r[0] for r in rows]
+        self.patient_loc_ids = [r[4] for r in rows]
 
         self.patient_combo["values"] = display
         self.patient_card.config(text=f"Patients\n{len(display)}")
@@ -440,32 +536,22 @@ class BillingFrame(tk.Frame):
             SELECT location_id, name, status FROM ClinicLocation ORDER BY name
         """).fetchall()
 
-        self.location_map.clear()
-        display = []
-        for loc_id, name, status in rows:
-            label = f"{name}  (ID {loc_id})" + (f" [{status}]" if status else "")
-            self.location_map[label] = loc_id
-            display.append(label)
+        display = [f"{name}  (ID {loc_id})" + (f" [{status}]" if status else "")
+                   for loc_id, name, status in rows]
+        self.location_ids = [r[0] for r in rows]
+        self.location_index = {loc_id: i for i, loc_id in enumerate(self.location_ids)}
 
         self.loc_combo["values"] = display
         if display:
             self.loc_combo.current(0)
 
     def _auto_location_from_patient(self):
-        label = self.patient_var.get().strip()
-        if not label or label not in self.patient_map:
-            return
-        pid = self.patient_map[label]
-        row = self._db().cursor().execute(
-            "SELECT location_id FROM Patient WHERE patient_id = ?", (pid,)
-        ).fetchone()
-        if not row or row[0] is None:
+        idx = self.patient_combo.current()
+        if idx < 0:
             return
-        loc_id = row[0]
-        for disp, mapped_id in self.location_map.items():
-            if mapped_id == loc_id:
-                self.loc_combo.set(disp)
-                break
+        loc_idx = self.location_index.get(self.patient_loc_ids[idx])
+        if loc_idx is not None:
+            self.loc_combo.current(loc_idx)
 
     def _apply_template(self):
         name = self.template_var.get().strip() or self.template_combo.get().strip()
@@ -495,17 +581,17 @@ class BillingFrame(tk.Frame):
             messagebox.showerror("Not logged in", "Please log in first.")
             return
 
-        patient_label = self.patient_var.get().strip()
-        if not patient_label or patient_label not in self.patient_map:
+        idx = self.patient_combo.current()
+        if idx < 0:
             messagebox.showerror("Missing", "Please select a patient.")
             return
-        patient_id = self.patient_map[patient_label]
+        patient_id = self.patient_ids[idx]
 
-        loc_label = self.loc_var.get().strip()
-        if not loc_label or loc_label not in self.location_map:
+        loc_idx = self.loc_combo.current()
+        if loc_idx < 0:
             messagebox.showerror("Missing", "Please select a clinic location.")
             return
-        location_id = self.location_map[loc_label]
+        location_id = self.location_ids[loc_idx]
 
         due = self.due_var.get().strip()
         if not is_valid_date_yyyy_mm_dd(due):
@@ -520,18 +606,17 @@ class BillingFrame(tk.Frame):
             messagebox.showerror("Invalid amount", "Amount must be a positive number.")
             return
 
-        self._db().execute("""
-            INSERT INTO Bill (patient_id, location_id, amount, due_date, status)
-            VALUES (?, ?, ?, ?, 'unpaid')
-        """, (patient_id, location_id, amount, due))
-        self._db().commit()
+        with self._db() as conn:
+            conn.execute("""
+                INSERT INTO Bill (patient_id, location_id, amount, due_date, status)
+                VALUES (?, ?, ?, ?, 'unpaid')
+            """, (patient_id, location_id, amount, due))
 
         messagebox.showinfo("Success", "Bill created.")
         self._load_recent_bills()
 
     def _load_recent_bills(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.tree.delete(*self.tree.get_children())
 
         rows = self._db().cursor().execute("""
             SELECT
@@ -12,10 +12,9 @@ Form panel is now inline on the right side (mirrors StaffManagementFrame layout)
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
-from PIL import Image, ImageTk
 
-# ── DB ──────────────────────────────────────────────────────────────
-DB_NAME = "healthcare.db"
+from database import get_conn
+from image_cache import load_icon
 
 # ── Style (mirrors careflow_dashboard.py) ───────────────────────────
 BG_LIGHT         = "#e6f2ec"
@@ -42,33 +41,90 @@ BTN_SIDEBAR = BG_SIDEBAR
 
 
 # ── DB helpers ───────────────────────────────────────────────────────
+_clinic_indexes_ready = False
+
+
+def ensure_clinic_indexes():
+    # The only place idx_cliniclocation_name is created. Every location picker
+    # sorts by name; this screen and location_choices() make sure it exists.
+    global _clinic_indexes_ready
+    if _clinic_indexes_ready:
+        return
+    try:
+        conn = get_conn()
+        with conn:
+            cur  = conn.cursor()
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_cliniclocation_name ON ClinicLocation(name)")
+        _clinic_indexes_ready = True
+    except sqlite3.Error:
+        pass
+
+
+# Last get_all_active_clinics() result, keyed on (_CLINIC_VERSION, data_version).
+# Our own writes bump _CLINIC_VERSION; PRAGMA data_version changes when any
+# other connection (another page or process) commits to the database.
+_CLINIC_VERSION = 0
+_clinic_cache = None
+
+
+def invalidate_clinic_cache():
+    global _CLINIC_VERSION
+    _CLINIC_VERSION += 1
+
+
 def get_all_active_clinics():
+    global _clinic_cache
     try:
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_conn()
+        key  = (_CLINIC_VERSION, conn.execute("PRAGMA data_version").fetchone()[0])
+        if _clinic_cache is not None and _clinic_cache[0] == key:
+            return _clinic_cache[1]
         cur  = conn.cursor()
         cur.execute("""
             SELECT location_id, name, city, state
             FROM   ClinicLocation
             WHERE  status = 'active'
+            ORDER  BY location_id
         """)
         rows = cur.fetchall()
-        conn.close()
+        _clinic_cache = (key, rows)
         return rows
     except sqlite3.Error as e:
         messagebox.showerror("Database Error", f"Failed to fetch clinics:\n\n{e}")
         return []
 
 
+# (label, location_id) pairs for the patient and staff location pickers: every
+# clinic, by name. Cached under the same key as get_all_active_clinics().
+_choices_cache = None
+
+
+def location_choices():
+    global _choices_cache
+    ensure_clinic_indexes()
+    conn = get_conn()
+    key  = (_CLINIC_VERSION, conn.execute("PRAGMA data_version").fetchone()[0])
+    if _choices_cache is None or _choices_cache[0] != key:
+        rows = conn.execute(
+            "SELECT location_id, name, status FROM ClinicLocation ORDER BY name"
+        ).fetchall()
+        _choices_cache = (key, tuple(
+            (f"{name}  (ID {loc_id})" + (f" [{status}]" if status else ""), loc_id)
+            for loc_id, name, status in rows
+        ))
+    return _choices_cache[1]
+
+
 def add_clinic_location(name, address, city, state, zip_code, phone):
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cur  = conn.cursor()
-        cur.execute("""
-            INSERT INTO ClinicLocation (name, address, city, state, zip, phone, status)
-            VALUES (?, ?, ?, ?, ?, ?, 'active')
-        """, (name, address, city, state, zip_code, phone))
-        conn.commit()
-        conn.close()
+        conn = get_conn()
+        with conn:
+            cur  = conn.cursor()
+            cur.execute("""
+                INSERT INTO ClinicLocation (name, address, city, state, zip, phone, status)
+                VALUES (?, ?, ?, ?, ?, ?, 'active')
+            """, (name, address, city, state, zip_code, phone))
+        invalidate_clinic_cache()
         return True
     except sqlite3.Error as e:
         messagebox.showerror("Database Error", f"Failed to add clinic:\n\n{e}")
@@ -77,15 +133,15 @@ def add_clinic_location(name, address, city, state, zip_code, phone):
 
 def update_clinic_location(location_id, name, address, city, state, zip_code, phone):
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cur  = conn.cursor()
-        cur.execute("""
-            UPDATE ClinicLocation
-            SET    name=?, address=?, city=?, state=?, zip=?, phone=?
-            WHERE  location_id=?
-        """, (name, address, city, state, zip_code, phone, location_id))
-        conn.commit()
-        conn.close()
+        conn = get_conn()
+        with conn:
+            cur  = conn.cursor()
+            cur.execute("""
+                UPDATE ClinicLocation
+                SET    name=?, address=?, city=?, state=?, zip=?, phone=?
+                WHERE  location_id=?
+            """, (name, address, city, state, zip_code, phone, location_id))
+        invalidate_clinic_cache()
         return True
     except sqlite3.Error as e:
         messagebox.showerror("Database Error", f"Failed to update clinic:\n\n{e}")
@@ -94,14 +150,14 @@ def update_clinic_location(location_id, name, address, city, state, zip_code, ph
 
 def soft_delete_clinic_location(clinic_id):
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cur  = conn.cursor()
-        cur.execute("""
-            UPDATE ClinicLocation SET status = 'inactive'
-            WHERE  location_id = ?
-        """, (clinic_id,))
-        conn.commit()
-        conn.close()
+        conn = get_conn()
+        with conn:
+            cur  = conn.cursor()
+            cur.execute("""
+                UPDATE ClinicLocation SET status = 'inactive'
+                WHERE  location_id = ?
+            """, (clinic_id,))
+        invalidate_clinic_cache()
         return True
     except sqlite3.Error as e:
         messagebox.showerror("Database Error", f"Failed to delete clinic:\n\n{e}")
@@ -110,7 +166,7 @@ def soft_delete_clinic_location(clinic_id):
 
 def get_clinic_full(clinic_id):
     try:
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_conn()
         cur  = conn.cursor()
         cur.execute("""
             SELECT name, address, city, state, zip, phone
@@ -118,7 +174,6 @@ def get_clinic_full(clinic_id):
             WHERE  location_id = ?
         """, (clinic_id,))
         row = cur.fetchone()
-        conn.close()
         return row
     except sqlite3.Error:
         return None
@@ -176,7 +231,8 @@ class _ClinicBase:
         container.grid_columnconfigure(0, weight=1)
 
         style = ttk.Style()
-        style.theme_use("clam")
+        if style.theme_use() != "clam":
+            style.theme_use("clam")
         style.configure("CareFlow.Treeview",
                         background=CARD_BG, fieldbackground=CARD_BG,
                         foreground=TEXT, rowheight=30, font=FONT_BODY)
@@ -258,7 +314,7 @@ class _ClinicBase:
         tk.Button(bar, text="✕  Delete",   bg=BTN_RED,    activebackground="#922b21",
                   command=self._do_delete,                 **btn_cfg).pack(side="left", padx=(0, 6))
         tk.Button(bar, text="↺  Refresh",  bg=BTN_GRAY,   activebackground="#5d6d7e",
-                  command=self.refresh_table,              **btn_cfg).pack(side="left", padx=(0, 6))
+                  command=self._force_refresh,             **btn_cfg).pack(side="left", padx=(0, 6))
         tk.Button(bar, text="Clear",       bg=BTN_GRAY,   activebackground="#5d6d7e",
                   command=self._clear_form,                **btn_cfg).pack(side="left")
 
@@ -273,9 +329,12 @@ class _ClinicBase:
                  font=FONT_SMALL).pack(anchor="nw", padx=12)
 
     # ── Table helpers ────────────────────────────────────────────────
+    def _force_refresh(self):
+        invalidate_clinic_cache()
+        self.refresh_table()
+
     def refresh_table(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        self.tree.delete(*self.tree.get_children())
         clinics = get_all_active_clinics()
         for c in clinics:
             self.tree.insert("", "end", iid=str(c[0]), values=c)
@@ -306,8 +365,9 @@ class _ClinicBase:
         for e in self.entries.values():
             e.delete(0, tk.END)
         self._selected_id = None
-        if self.tree.selection():
-            self.tree.selection_remove(self.tree.selection())
+        sel = self.tree.selection()
+        if sel:
+            self.tree.selection_remove(sel)
         self.status_var.set("Form cleared.")
 
     def _validate(self, data):
@@ -380,6 +440,7 @@ class ClinicLocationApp(tk.Tk, _ClinicBase):
         self.geometry("1060x660")
         self.minsize(860, 520)
         self.configure(bg=BG_LIGHT)
+        ensure_clinic_indexes()
         self._build_ui()
         self.refresh_table()
 
@@ -428,6 +489,7 @@ class ClinicFrame(tk.Frame, _ClinicBase):
         super().__init__(parent, bg=BG_LIGHT)
         self.controller = controller
         self.role = role
+        ensure_clinic_indexes()
         self._build_ui()
         self.refresh_table()
 
@@ -436,11 +498,6 @@ class ClinicFrame(tk.Frame, _ClinicBase):
         outer.pack(fill="both", expand=True, padx=20, pady=20)
         
         # Load icons (keep references to avoid garbage collection)
-        def load_icon(path, size=(18, 20)):
-            img = Image.open(path)
-            img = img.resize(size, Image.LANCZOS)
-            return ImageTk.PhotoImage(img)
-        
         self.icons = {
             "Dashboard": load_icon("icons/dashboard_icon.png"),
             "Patient": load_icon("icons/patient_icon.png"),
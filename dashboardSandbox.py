@@ -3,19 +3,23 @@
 careflow_dashboard.py
 
 Includes:
- - Left sidebar with navigation buttons (functional placeholders that print actions)
+ - Left sidebar with navigation buttons (functional placeholders that log actions)
  - Top header with title, user label, and simple avatar button
  - Four overview "cards" showing counts (clickable placeholders)
  - Section table area with headers and a simple sample row
  - Responsive-ish layout using grid; minimal dependencies (only stdlib Tkinter)
 """
 
+import logging
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-import sqlite3
 
-DB_NAME = "healthcare.db"
+from database import get_conn
+from image_cache import load_icon
+
+log = logging.getLogger(__name__)
+
 
 # ---------- Configuration / Styles ----------
 BG_LIGHT = "#e6f2ec"
@@ -33,20 +37,21 @@ FONT_TABLE = ("Helvetica", 10)
 
 # ---------- Helper functions (placeholders) ----------
 def on_nav(name):
-    print(f"[NAV] {name} clicked")
+    log.debug("[NAV] %s clicked", name)
 
 def on_card_click(name):
-    print(f"[CARD] {name} clicked")
+    log.debug("[CARD] %s clicked", name)
     messagebox.showinfo("Card Clicked", f"You clicked: {name}")
 
 def on_action_view(row_id):
-    print(f"[ACTION] View row {row_id}")
+    log.debug("[ACTION] View row %s", row_id)
     messagebox.showinfo("View", f"View details for ID: {row_id}")
 
 def on_action_edit(row_id):
-    print(f"[ACTION] Edit row {row_id}")
+    log.debug("[ACTION] Edit row %s", row_id)
     messagebox.showinfo("Edit", f"Edit details for ID: {row_id}")
 
+
 # ---------- UI Building ----------
 class CareFlowDashboard(tk.Tk):
     def __init__(self):
@@ -150,12 +155,17 @@ class CareFlowDashboard(tk.Tk):
         scrollbar = ttk.Scrollbar(body_frame, orient="vertical", command=canvas.yview)
         scrollable = tk.Frame(canvas, bg=BG_PANEL)
 
-        scrollable.bind(
-            "<Configure>",
-            lambda e: canvas.configure(
-                scrollregion=canvas.bbox("all")
-            )
-        )
+        # The frame is the canvas's only item, anchored at (0, 0), so its own
+        # size is the scroll region; skip Configure events that didn't resize it.
+        last_size = [None]
+
+        def on_body_configure(e):
+            if (e.width, e.height) == last_size[0]:
+                return
+            last_size[0] = (e.width, e.height)
+            canvas.configure(scrollregion=(0, 0, e.width, e.height))
+
+        scrollable.bind("<Configure>", on_body_configure)
 
         canvas.create_window((0, 0), window=scrollable, anchor="nw")
         canvas.configure(yscrollcommand=scrollbar.set)
@@ -225,9 +235,7 @@ class DashboardFrame(tk.Frame):
 
     def _stat(self, query, default="—"):
         try:
-            conn = sqlite3.connect(DB_NAME)
-            val = conn.execute(query).fetchone()[0]
-            conn.close()
+            val = get_conn().execute(query).fetchone()[0]
             return str(val) if val is not None else default
         except Exception:
             return default
@@ -252,15 +260,6 @@ class DashboardFrame(tk.Frame):
                  font=("Helvetica", 9, "bold"), justify="left",
                  padx=8, pady=8).pack(anchor="w")
 
-        def load_icon(path, size=(18, 20)):
-            try:
-                from PIL import Image, ImageTk
-                img = Image.open(path).resize(size, Image.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                return photo
-            except Exception:
-                return None
-
         if not hasattr(self, "_sidebar_icons"):
             self._sidebar_icons = {
                 "Dashboard": load_icon("icons/dashboard_icon.png"),
@@ -340,7 +339,10 @@ class DashboardFrame(tk.Frame):
                  bg=BG_PANEL, fg=TEXT, font=FONT_HEADER).pack(anchor="w", pady=(6, 4))
 
         style = ttk.Style()
-        style.theme_use("clam")
+        # Re-selecting the active theme fires <<ThemeChanged>> and relayouts
+        # every ttk widget, so only switch when it isn't already clam.
+        if style.theme_use() != "clam":
+            style.theme_use("clam")
         style.configure("CareFlow.Treeview",
                         background=CARD_BG, fieldbackground=CARD_BG,
                         foreground=TEXT, rowheight=28, font=FONT_TABLE)
@@ -376,8 +378,7 @@ class DashboardFrame(tk.Frame):
         vsb.grid(row=0, column=1, sticky="ns")
 
         try:
-            conn = sqlite3.connect(DB_NAME)
-            rows = conn.execute("""
+            rows = get_conn().execute("""
                 SELECT p.patient_id,
                        p.last_name || ', ' || p.first_name,
                        COALESCE(p.dob, ''),
@@ -389,7 +390,6 @@ class DashboardFrame(tk.Frame):
                 ORDER BY p.patient_id DESC
                 LIMIT 10
             """).fetchall()
-            conn.close()
             for row in rows:
                 tree.insert("", "end", values=row)
         except Exception:
@@ -0,0 +1,78 @@
+"""
+database.py
+
+Shared SQLite access for the CareFlow pages. No Tk code lives here, so the
+page and billing modules can all import it without pulling in each other.
+"""
+
+import logging
+import os
+import sqlite3
+from typing import Dict
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_NAME = os.path.join(BASE_DIR, "healthcare.db")
+
+log = logging.getLogger(__name__)
+
+# One connection per foreign_keys setting, opened on first use.
+_conns: Dict[bool, sqlite3.Connection] = {}
+
+
+def get_conn(foreign_keys: bool = True) -> sqlite3.Connection:
+    """Return the shared connection, opening it on first use.
+
+    The billing pages pass foreign_keys=False: their tables predate
+    enforcement and hold rows that would fail the check.
+    """
+    conn = _conns.get(foreign_keys)
+    if conn is None:
+        conn = sqlite3.connect(DB_NAME)
+        conn.execute("PRAGMA busy_timeout = 5000;")
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.execute("PRAGMA cache_size = -64000;")
+        conn.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'};")
+        _conns[foreign_keys] = conn
+    return conn
+
+
+# UNIQUE LOWER(email) indexes. The patient and staff pages create them when
+# they are built, and the billing schema migration creates both at v3.
+PATIENT_EMAIL_INDEX = "idx_patient_email_unique"
+STAFF_EMAIL_INDEX = "idx_staff_email_unique"
+
+
+def is_duplicate_email(err: sqlite3.Error, index: str) -> bool:
+    """True when err was raised by the given unique email index."""
+    return isinstance(err, sqlite3.IntegrityError) and index in str(err)
+
+
+def _create_email_index(conn: sqlite3.Connection, table: str, index: str,
+                        lookup_index: str) -> bool:
+    try:
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {index} "
+                     f"ON {table}(LOWER(email))")
+    except sqlite3.IntegrityError:
+        log.warning("%s has duplicate emails; %s was not created and "
+                    "duplicates are not rejected until they are cleaned up",
+                    table, index)
+        return False
+    # The unique index serves the login lookups the plain one was added for.
+    conn.execute(f"DROP INDEX IF EXISTS {lookup_index}")
+    return True
+
+
+def create_patient_email_index(conn: sqlite3.Connection) -> bool:
+    """Create PATIENT_EMAIL_INDEX. Returns False, after logging a warning,
+    when existing duplicate emails block it."""
+    return _create_email_index(conn, "Patient", PATIENT_EMAIL_INDEX,
+                               "idx_patient_email_lower")
+
+
+def create_staff_email_index(conn: sqlite3.Connection) -> bool:
+    """Create STAFF_EMAIL_INDEX. Returns False, after logging a warning,
+    when existing duplicate emails block it."""
+    return _create_email_index(conn, "Staff", STAFF_EMAIL_INDEX,
+                               "idx_staff_email_lower")
@@ -0,0 +1,44 @@
+"""
+image_cache.py
+
+Decoded images and PhotoImages shared by every CareFlow frame. Pages rebuild
+their sidebars on each navigation, so each icon is decoded and uploaded once.
+"""
+
+import functools
+from PIL import Image, ImageTk
+
+
+@functools.lru_cache(maxsize=32)
+def _load_image(path, size, bg=None):
+    """Decode and resize an image once; the PIL Image is reused across frames.
+
+    With *bg*, alpha is composited onto that colour so Tk gets an RGB image
+    and skips its slow per-pixel RGBA upload.
+    """
+    img = Image.open(path).resize(size, Image.LANCZOS)
+    if bg is not None:
+        img = img.convert("RGBA")
+        flat = Image.new("RGB", img.size, bg)
+        flat.paste(img, mask=img.getchannel("A"))
+        img = flat
+    return img
+
+
+# The app has a single Tk root, so PhotoImages can be shared between the
+# frames it rebuilds on every navigation instead of re-uploading the pixels.
+_PHOTO_CACHE = {}
+
+
+def load_photo(path, size, bg=None):
+    key = (path, size, bg)
+    if key not in _PHOTO_CACHE:
+        _PHOTO_CACHE[key] = ImageTk.PhotoImage(_load_image(path, size, bg))
+    return _PHOTO_CACHE[key]
+
+
+def load_icon(path, size=(18, 20)):
+    try:
+        return load_photo(path, size)
+    except Exception:
+        return None
@@ -1,13 +1,7 @@
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
-from dashboardSandbox    import DashboardFrame
-from staff_management    import StaffManagementFrame
-from clinic_location     import ClinicFrame
-from records             import RecordsFrame
-from patient_management  import PatientManagementFrame
-from billing_staff_app   import BillingFrame as StaffBillingFrame
-from billing_patient_app import BillingFrame as PatientBillingFrame
+
+from image_cache import load_icon, load_photo
 
 
 class PortalController:
@@ -91,13 +85,6 @@ class BillingLandingFrame(tk.Frame):
                 "Records":   "RecordsMenuPage",
                 "Billing":   None,
             }
-        def load_icon(path, size=(18, 20)):
-            try:
-                img = Image.open(path).resize(size, Image.LANCZOS)
-                return ImageTk.PhotoImage(img)
-            except Exception:
-                return None
-
         self._billing_icons = {
             "Dashboard": load_icon("icons/dashboard_icon.png"),
             "Patient":   load_icon("icons/patient_icon.png"),
@@ -247,13 +234,6 @@ class MainApp(tk.Tk):
         def _role_required():
             messagebox.showinfo("Role Required", "You must select your role first.")
 
-        def load_icon(path, size=(18, 20)):
-            try:
-                img = Image.open(path).resize(size, Image.LANCZOS)
-                return ImageTk.PhotoImage(img)
-            except Exception:
-                return None
-
         icon_map = {
             "Dashboard": load_icon("icons/dashboard_icon.png"),
             "Patient":   load_icon("icons/patient_icon.png"),
@@ -287,9 +267,7 @@ class MainApp(tk.Tk):
                  bg=BG_PANEL, fg=BTN_NEUTRAL,
                  font=("Helvetica", 10)).pack(side="left", pady=14)
         try:
-            from PIL import Image, ImageTk
-            _timg = Image.open("img/simple_clip_img.png").resize((45, 45), Image.LANCZOS)
-            self._text_logo = ImageTk.PhotoImage(_timg)
+            self._text_logo = load_photo("icons/simple_clip_img.png", (45, 45), BG_PANEL)
             tk.Label(header, image=self._text_logo, bg=BG_PANEL).pack(side="right", padx=14, pady=8)
         except Exception:
             pass
@@ -301,9 +279,7 @@ class MainApp(tk.Tk):
         center.place(relx=0.5, rely=0.5, anchor="center")
 
         try:
-            from PIL import Image, ImageTk
-            _rimg = Image.open("img/logo_round_img.png").resize((120, 120), Image.LANCZOS)
-            self._round_logo = ImageTk.PhotoImage(_rimg)
+            self._round_logo = load_photo("icons/logo_round_img.png", (120, 120), BG_PANEL)
             tk.Label(center, image=self._round_logo, bg=BG_PANEL).pack(pady=(0, 16))
         except Exception:
             pass
@@ -332,29 +308,37 @@ class MainApp(tk.Tk):
     def _show_dashboard(self, role):
         for w in self.winfo_children():
             w.destroy()
+        from dashboardSandbox import DashboardFrame
         frame = DashboardFrame(self, role=role,
                                back_cmd=self._build_ui,
                                nav_cmd=lambda item: self._portal_nav(item, role))
         frame.pack(fill="both", expand=True)
 
+    # Page modules are imported on first navigation so the landing screen
+    # doesn't pay for sqlite3, hashlib and every page's widget code up front.
     def _portal_nav(self, item, role):
         ctrl = PortalController(self, role)
         for w in self.winfo_children():
             w.destroy()
         if item == "Patient":
+            from patient_management import PatientManagementFrame
             f = PatientManagementFrame(self, controller=ctrl, role=role)
         elif item == "Staff":
+            from staff_management import StaffManagementFrame
             f = StaffManagementFrame(self, controller=ctrl, role=role)
         elif item == "Clinic":
+            from clinic_location import ClinicFrame
             f = ClinicFrame(self, controller=ctrl, role=role)
         elif item == "Records":
+            from records import RecordsFrame
             f = RecordsFrame(self, controller=ctrl, role=role)
         elif item == "Billing":
             f = BillingLandingFrame(self, controller=ctrl, role=role)
         elif item == "StaffBilling":
+            from billing_staff_app import BillingFrame as StaffBillingFrame
             f = StaffBillingFrame(self, controller=ctrl, role=role)
-
         elif item == "PatientBilling":
+            from billing_patient_app import BillingFrame as PatientBillingFrame
             f = PatientBillingFrame(self, controller=ctrl)
         elif item == "Dashboard":
             self._show_dashboard(role)
@@ -11,6 +11,12 @@ from tkinter import ttk, messagebox
 import sqlite3
 from typing import Optional
 
+from clinic_location import location_choices
+from database import (get_conn, create_patient_email_index,
+                      is_duplicate_email, PATIENT_EMAIL_INDEX)
+from image_cache import load_icon
+from ui_constants import SEARCH_DEBOUNCE_MS
+
 # ==============================
 # Config / Styles
 # ==============================
@@ -35,23 +41,47 @@ FONT_NAV      = ("Helvetica", 10)
 FONT_LOGO     = ("Helvetica", 13, "bold")
 FONT_SMALL    = ("Helvetica", 10)
 
-DB_NAME = "healthcare.db"
-
 
 def is_valid_phone(s: str) -> bool:
-    import re
-    return bool(re.match(r"^\d{3}-\d{4}$", s))
+    # ###-####, ASCII digits only (str.isdecimal alone also accepts e.g. Arabic-Indic digits)
+    return (len(s) == 8 and s[3] == "-" and s.isascii()
+            and s[:3].isdecimal() and s[4:].isdecimal())
 
 # ==============================
 # DB helpers
 # ==============================
-def get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_NAME)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+INSERT_PATIENT_SQL = """
+    INSERT INTO Patient (
+        first_name, last_name, dob, sex, phone, email,
+        address, allergies, conditions, medications, notes,
+        emergency_contact, active_flag, location_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPDATE_PATIENT_SQL = """
+    UPDATE Patient SET
+        first_name=?, last_name=?, dob=?, sex=?, phone=?, email=?,
+        address=?, allergies=?, conditions=?, medications=?,
+        notes=?, emergency_contact=?, active_flag=?, location_id=?
+    WHERE patient_id=?
+"""
+
+
+def insert_patients(rows) -> None:
+    """Insert one or more Patient rows (INSERT_PATIENT_SQL order) in a single transaction."""
+    conn = get_conn()
+    with conn:
+        conn.executemany(INSERT_PATIENT_SQL, rows)
+
+
+# Set once the CREATE TABLE has run in this process; later page builds skip it.
+_patient_table_ready = False
 
 
 def ensure_patient_table() -> None:
+    global _patient_table_ready
+    if _patient_table_ready:
+        return
     conn = get_conn()
     conn.execute("""
         CREATE TABLE IF NOT EXISTS Patient (
@@ -74,7 +104,9 @@ def ensure_patient_table() -> None:
         )
     """)
     conn.commit()
-    conn.close()
+    with conn:
+        # Left unset on failure so the next page build tries the index again.
+        _patient_table_ready = create_patient_email_index(conn)
 
 
 # ==============================
@@ -89,10 +121,12 @@ class PatientManagementFrame(tk.Frame):
         ensure_patient_table()
 
         self._selected_id: Optional[int] = None
+        self._search_after: Optional[str] = None
         self._total_var    = tk.StringVar(value="0")
         self._active_var   = tk.StringVar(value="0")
         self._inactive_var = tk.StringVar(value="0")
         self.location_list = []
+        self.location_index = {}
 
         self._build_ui()
         self._load_locations()
@@ -161,14 +195,6 @@ class PatientManagementFrame(tk.Frame):
                 "Billing":   "BillingMenuPage",
             }
 
-        def load_icon(path, size=(18, 20)):
-            try:
-                from PIL import Image, ImageTk
-                img = Image.open(path).resize(size, Image.LANCZOS)
-                return ImageTk.PhotoImage(img)
-            except Exception:
-                return None
-
         self._patient_nav_icons = {
             "Dashboard": load_icon("icons/dashboard_icon.png"),
             "Patient":   load_icon("icons/patient_icon.png"),
@@ -239,7 +265,7 @@ class PatientManagementFrame(tk.Frame):
         tk.Label(search_frame, text="Search:", bg=BG_PANEL, fg=TEXT,
                  font=("Helvetica", 10, "bold")).pack(side="left", padx=(0, 6))
         self.search_var = tk.StringVar()
-        self.search_var.trace_add("write", lambda *_: self._load_patients())
+        self.search_var.trace_add("write", lambda *_: self._queue_search())
         tk.Entry(search_frame, textvariable=self.search_var, width=28,
                  font=FONT_SMALL, bg=CARD_BG, fg=TEXT, relief="flat",
                  highlightthickness=1, highlightbackground="#cde8dc",
@@ -271,7 +297,8 @@ class PatientManagementFrame(tk.Frame):
             row=0, column=0, sticky="w", padx=14, pady=(10, 4))
 
         style = ttk.Style()
-        style.theme_use("clam")
+        if style.theme_use() != "clam":
+            style.theme_use("clam")
         style.configure("CareFlow.Treeview",
                         background=CARD_BG, fieldbackground=CARD_BG,
                         foreground=TEXT, rowheight=28, font=FONT_TABLE)
@@ -425,15 +452,17 @@ class PatientManagementFrame(tk.Frame):
     # Keys that must be non-empty before saving
     _REQUIRED_KEYS = ("first_name", "last_name", "dob", "phone", "email", "conditions")
 
-    def _validate(self, data: dict) -> bool:
+    def _validate(self) -> bool:
         """
         Highlight empty required fields in red (like staff) and return False
         if any are missing.  Resets border to normal on fields that are filled.
+        Reads only the required entries, so a failed save never builds the
+        full form dict.
         """
         missing = []
         for key in self._REQUIRED_KEYS:
             entry = self.entries[key]
-            if data.get(key):
+            if entry.get().strip():
                 # restore normal border
                 entry.config(highlightbackground="#cde8dc", highlightcolor=ACCENT)
             else:
@@ -449,7 +478,7 @@ class PatientManagementFrame(tk.Frame):
             return False
 
         # Phone format check — must be ###-#### (e.g. 555-1234)
-        if not is_valid_phone(data.get("phone", "")):
+        if not is_valid_phone(self.entries["phone"].get().strip()):
             self.entries["phone"].config(
                 highlightbackground="#e74c3c", highlightcolor="#e74c3c"
             )
@@ -470,20 +499,31 @@ class PatientManagementFrame(tk.Frame):
     # ------------------------------------------------------------------
     def _load_locations(self):
         try:
-            conn = get_conn()
-            rows = conn.execute(
-                "SELECT location_id, name, status FROM ClinicLocation ORDER BY name"
-            ).fetchall()
-            conn.close()
-            self.location_list.clear()
+            self.location_list = list(location_choices())
+            self.location_index = {loc_id: i for i, (_, loc_id) in enumerate(self.location_list)}
             self.loc_listbox.delete(0, tk.END)
-            for loc_id, name, status in rows:
-                label = f"{name}  (ID {loc_id})" + (f" [{status}]" if status else "")
-                self.location_list.append((label, loc_id))
-                self.loc_listbox.insert(tk.END, label)
+            self.loc_listbox.insert(tk.END, *(label for label, _ in self.location_list))
         except sqlite3.Error as e:
             messagebox.showerror("DB Error", str(e))
 
+    def _queue_search(self):
+        """Reload once typing pauses instead of re-querying on every keystroke."""
+        if self._search_after:
+            self.after_cancel(self._search_after)
+        self._search_after = self.after(SEARCH_DEBOUNCE_MS, self._run_search)
+
+    def _run_search(self):
+        self._search_after = None
+        self._load_patients()
+
+    def destroy(self):
+        # Leaving the page mid-debounce would otherwise fire _run_search on
+        # a Tcl command that tk.Frame.destroy has already deleted.
+        if self._search_after:
+            self.after_cancel(self._search_after)
+            self._search_after = None
+        super().destroy()
+
     def _load_patients(self, event=None):
         search = self.search_var.get().strip().lower()
         show_inactive = self.show_inactive_var.get()
@@ -501,7 +541,6 @@ class PatientManagementFrame(tk.Frame):
         total    = conn.execute("SELECT COUNT(*) FROM Patient").fetchone()[0]
         active   = conn.execute("SELECT COUNT(*) FROM Patient WHERE active_flag=1").fetchone()[0]
         inactive = conn.execute("SELECT COUNT(*) FROM Patient WHERE active_flag=0").fetchone()[0]
-        conn.close()
 
         self._total_var.set(str(total))
         self._active_var.set(str(active))
@@ -538,7 +577,6 @@ class PatientManagementFrame(tk.Frame):
                    active_flag, location_id
             FROM Patient WHERE patient_id = ?
         """, (self._selected_id,)).fetchone()
-        conn.close()
 
         if row:
             # Unpack: first 12 are field values, then active_flag, then location_id
@@ -551,12 +589,10 @@ class PatientManagementFrame(tk.Frame):
             self.active_var.set(1 if active_flag else 0)
 
             self.loc_listbox.selection_clear(0, tk.END)
-            if assigned_loc_id is not None:
-                for i, (_, loc_id) in enumerate(self.location_list):
-                    if loc_id == assigned_loc_id:
-                        self.loc_listbox.selection_set(i)
-                        self.loc_listbox.see(i)
-                        break
+            i = self.location_index.get(assigned_loc_id)
+            if i is not None:
+                self.loc_listbox.selection_set(i)
+                self.loc_listbox.see(i)
 
             # Clear any leftover validation highlights when loading a record
             self._reset_required_highlights()
@@ -565,52 +601,44 @@ class PatientManagementFrame(tk.Frame):
         return {k: e.get().strip() for k, e in self.entries.items()}
 
     def _add_patient(self):
-        data = self._collect()
-        if not self._validate(data):
+        if not self._validate():
             return
+        data = self._collect()
         sel_locs = self.loc_listbox.curselection()
         loc_id = self.location_list[sel_locs[0]][1] if sel_locs else None
         try:
-            conn = get_conn()
-            conn.execute("""
-                INSERT INTO Patient (
-                    first_name, last_name, dob, sex, phone, email,
-                    address, allergies, conditions, medications, notes,
-                    emergency_contact, active_flag, location_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (*data.values(), self.active_var.get(), loc_id))
-            conn.commit()
-            conn.close()
+            insert_patients([(*data.values(), self.active_var.get(), loc_id)])
             messagebox.showinfo("Success", "Patient added successfully.")
             self._load_patients()
             self._clear_form()
         except sqlite3.Error as e:
-            messagebox.showerror("Database Error", str(e))
+            if is_duplicate_email(e, PATIENT_EMAIL_INDEX):
+                messagebox.showerror("Duplicate Email", "Email already registered.")
+            else:
+                messagebox.showerror("Database Error", str(e))
 
     def _update_patient(self):
         if not self._selected_id:
             messagebox.showwarning("Select", "Please select a patient first.")
             return
-        data = self._collect()
-        if not self._validate(data):
+        if not self._validate():
             return
+        data = self._collect()
         sel_locs = self.loc_listbox.curselection()
         loc_id = self.location_list[sel_locs[0]][1] if sel_locs else None
         try:
             conn = get_conn()
-            conn.execute("""
-                UPDATE Patient SET
-                    first_name=?, last_name=?, dob=?, sex=?, phone=?, email=?,
-                    address=?, allergies=?, conditions=?, medications=?,
-                    notes=?, emergency_contact=?, active_flag=?, location_id=?
-                WHERE patient_id=?
-            """, (*data.values(), self.active_var.get(), loc_id, self._selected_id))
-            conn.commit()
-            conn.close()
+            with conn:
+                conn.execute(UPDATE_PATIENT_SQL,
+                             (*data.values(), self.active_var.get(), loc_id,
+                              self._selected_id))
             messagebox.showinfo("Updated", "Patient updated successfully.")
             self._load_patients()
         except sqlite3.Error as e:
-            messagebox.showerror("Database Error", str(e))
+            if is_duplicate_email(e, PATIENT_EMAIL_INDEX):
+                messagebox.showerror("Duplicate Email", "Email already registered.")
+            else:
+                messagebox.showerror("Database Error", str(e))
 
     def _deactivate_patient(self):
         if not self._selected_id:
@@ -620,10 +648,9 @@ class PatientManagementFrame(tk.Frame):
             return
         try:
             conn = get_conn()
-            conn.execute("UPDATE Patient SET active_flag=0 WHERE patient_id=?",
-                         (self._selected_id,))
-            conn.commit()
-            conn.close()
+            with conn:
+                conn.execute("UPDATE Patient SET active_flag=0 WHERE patient_id=?",
+                             (self._selected_id,))
             messagebox.showinfo("Deactivated", "Patient has been deactivated.")
             self._load_patients()
             self._clear_form()
@@ -639,9 +666,8 @@ class PatientManagementFrame(tk.Frame):
             return
         try:
             conn = get_conn()
-            conn.execute("DELETE FROM Patient WHERE patient_id=?", (self._selected_id,))
-            conn.commit()
-            conn.close()
+            with conn:
+                conn.execute("DELETE FROM Patient WHERE patient_id=?", (self._selected_id,))
             messagebox.showinfo("Deleted", "Patient removed.")
             self._load_patients()
             self._clear_form()
@@ -655,8 +681,9 @@ class PatientManagementFrame(tk.Frame):
         self.loc_listbox.selection_clear(0, tk.END)
         self._selected_id = None
         self._reset_required_highlights()
-        if self.tree.selection():
-            self.tree.selection_remove(self.tree.selection())
+        sel = self.tree.selection()
+        if sel:
+            self.tree.selection_remove(sel)
 
 
 # ==============================
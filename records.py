@@ -8,12 +8,17 @@ and visual style integrated.
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import logging
 import os
 import shutil
 import sqlite3
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
+from database import get_conn
+from image_cache import load_icon
+from ui_constants import SEARCH_DEBOUNCE_MS
+
 # ==============================
 # Config / Styles (from dashboard)
 # ==============================
@@ -35,41 +40,40 @@ FONT_TABLE    = ("Helvetica", 10)
 FONT_NAV      = ("Helvetica", 10)
 FONT_LOGO     = ("Helvetica", 13, "bold")
 
-DB_NAME   = "healthcare.db"
 DIRECTORY = "record_files"
 
-if not os.path.exists(DIRECTORY):
-    os.makedirs(DIRECTORY)
+log = logging.getLogger(__name__)
 
 
 # ==============================
 # DB Helpers (unchanged logic)
 # ==============================
-def get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_NAME)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+_records_table_ready = False
 
 
 def ensure_records_table_exists() -> None:
+    """Create the records table and its indexes, once per process."""
+    global _records_table_ready
+    if _records_table_ready:
+        return
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS records (
-            record_id   INTEGER PRIMARY KEY AUTOINCREMENT,
-            patient_id  INTEGER NOT NULL,
-            staff_id    INTEGER,
-            filename    TEXT NOT NULL,
-            filepath    TEXT NOT NULL,
-            upload_date TEXT NOT NULL,
-            FOREIGN KEY (patient_id) REFERENCES Patient(patient_id),
-            FOREIGN KEY (staff_id)   REFERENCES Staff(staff_id)
-        )
-    """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_records_patient_id ON records(patient_id)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_records_staff_id   ON records(staff_id)")
-    conn.commit()
-    conn.close()
+    with conn:
+        cur = conn.cursor()
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                record_id   INTEGER PRIMARY KEY AUTOINCREMENT,
+                patient_id  INTEGER NOT NULL,
+                staff_id    INTEGER,
+                filename    TEXT NOT NULL,
+                filepath    TEXT NOT NULL,
+                upload_date TEXT NOT NULL,
+                FOREIGN KEY (patient_id) REFERENCES Patient(patient_id),
+                FOREIGN KEY (staff_id)   REFERENCES Staff(staff_id)
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_records_patient_id ON records(patient_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_records_staff_id   ON records(staff_id)")
+    _records_table_ready = True
 
 
 def load_clinics() -> Tuple[Dict[str, int], List[str]]:
@@ -81,17 +85,13 @@ def load_clinics() -> Tuple[Dict[str, int], List[str]]:
         ORDER BY name, city, state
     """)
     rows = cur.fetchall()
-    conn.close()
 
-    clinic_map: Dict[str, int] = {}
-    display:    List[str]      = []
-    for loc_id, name, city, state, status in rows:
-        label = f"{name} ({city}, {state}) [ID {loc_id}]"
-        if status:
-            label += f" [{status}]"
-        clinic_map[label] = loc_id
-        display.append(label)
-    return clinic_map, display
+    # Labels embed the ID, so they are unique and the dict keeps row order.
+    clinic_map: Dict[str, int] = {
+        f"{name} ({city}, {state}) [ID {loc_id}]" + (f" [{status}]" if status else ""): loc_id
+        for loc_id, name, city, state, status in rows
+    }
+    return clinic_map, list(clinic_map)
 
 
 def load_patients_for_clinic(location_id: int) -> Tuple[Dict[str, int], List[str]]:
@@ -104,17 +104,12 @@ def load_patients_for_clinic(location_id: int) -> Tuple[Dict[str, int], List[str
         ORDER BY last_name, first_name
     """, (location_id,))
     rows = cur.fetchall()
-    conn.close()
 
-    patient_map: Dict[str, int] = {}
-    display:     List[str]      = []
-    for pid, fn, ln, email in rows:
-        label = f"{ln}, {fn} (ID {pid})"
-        if email:
-            label += f"  <{email}>"
-        patient_map[label] = pid
-        display.append(label)
-    return patient_map, display
+    patient_map: Dict[str, int] = {
+        f"{ln}, {fn} (ID {pid})" + (f"  <{email}>" if email else ""): pid
+        for pid, fn, ln, email in rows
+    }
+    return patient_map, list(patient_map)
 
 
 def unique_dest_path(dest_dir: str, filename: str) -> Tuple[str, str]:
@@ -133,7 +128,7 @@ def unique_dest_path(dest_dir: str, filename: str) -> Tuple[str, str]:
 # Nav helper
 # ==============================
 def on_nav(name: str):
-    print(f"[NAV] {name} clicked")
+    log.debug("[NAV] %s clicked", name)
 
 
 # ==============================
@@ -148,6 +143,7 @@ class CareFlowRecords(tk.Tk):
         self.grid_rowconfigure(1, weight=1)
         self.grid_columnconfigure(1, weight=1)
 
+        self._file_list_after: Optional[str] = None
         ensure_records_table_exists()
         self._build_sidebar()
         self._build_header()
@@ -241,7 +237,8 @@ class CareFlowRecords(tk.Tk):
 
         # Style for ttk widgets to match theme
         style = ttk.Style()
-        style.theme_use("clam")
+        if style.theme_use() != "clam":
+            style.theme_use("clam")
         style.configure("TCombobox",
                         fieldbackground=CARD_BG, background=BG_PANEL,
                         foreground=TEXT, selectbackground=ACCENT)
@@ -282,7 +279,7 @@ class CareFlowRecords(tk.Tk):
         self.search_var = tk.StringVar()
         se = ttk.Entry(panel, textvariable=self.search_var, width=54)
         se.grid(row=2, column=1, sticky="ew", padx=(0, 6), pady=6)
-        se.bind("<KeyRelease>", self._update_file_list)
+        se.bind("<KeyRelease>", self._queue_file_list)
         reload_btn("Refresh", self._update_file_list, 2)
 
     # ------------------------------------------------------------------
@@ -400,8 +397,7 @@ class CareFlowRecords(tk.Tk):
         self._update_file_list()
 
     def _clear_tree(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.tree.delete(*self.tree.get_children())
 
     def _get_selected_record(self) -> Optional[Tuple[int, str]]:
         sel = self.tree.selection()
@@ -410,6 +406,16 @@ class CareFlowRecords(tk.Tk):
         v = self.tree.item(sel[0], "values")
         return (int(v[0]), v[2]) if v else None
 
+    def _queue_file_list(self, event=None):
+        """Re-query once typing in the search box pauses, not per keystroke."""
+        if self._file_list_after:
+            self.after_cancel(self._file_list_after)
+        self._file_list_after = self.after(SEARCH_DEBOUNCE_MS, self._run_file_list)
+
+    def _run_file_list(self):
+        self._file_list_after = None
+        self._update_file_list()
+
     def _update_file_list(self, event=None):
         clinic_id = self._get_clinic_id()
         if not clinic_id:
@@ -445,7 +451,6 @@ class CareFlowRecords(tk.Tk):
                 if search_term and search_term not in (filename or "").lower():
                     continue
                 self.tree.insert("", "end", values=(record_id, patient_name, filename, upload_date))
-            conn.close()
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
 
@@ -463,16 +468,16 @@ class CareFlowRecords(tk.Tk):
         original_filename      = os.path.basename(file_path)
         final_filename, dest   = unique_dest_path(DIRECTORY, original_filename)
         try:
+            os.makedirs(DIRECTORY, exist_ok=True)
             shutil.copy(file_path, dest)
             upload_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             conn = get_conn()
-            cur  = conn.cursor()
-            cur.execute(
-                "INSERT INTO records (patient_id, staff_id, filename, filepath, upload_date) VALUES (?,?,?,?,?)",
-                (patient_id, None, final_filename, dest, upload_date)
-            )
-            conn.commit()
-            conn.close()
+            with conn:
+                cur  = conn.cursor()
+                cur.execute(
+                    "INSERT INTO records (patient_id, staff_id, filename, filepath, upload_date) VALUES (?,?,?,?,?)",
+                    (patient_id, None, final_filename, dest, upload_date)
+                )
             self._update_file_list()
             messagebox.showinfo("Success", f"{final_filename} uploaded successfully.")
         except Exception as e:
@@ -489,7 +494,6 @@ class CareFlowRecords(tk.Tk):
             cur  = conn.cursor()
             cur.execute("SELECT filepath FROM records WHERE record_id = ?", (record_id,))
             row  = cur.fetchone()
-            conn.close()
             if not row:
                 messagebox.showerror("Not found", "Record not found in database.")
                 return
@@ -515,14 +519,13 @@ class CareFlowRecords(tk.Tk):
             return
         try:
             conn = get_conn()
-            cur  = conn.cursor()
-            cur.execute("SELECT filepath FROM records WHERE record_id = ?", (record_id,))
-            row  = cur.fetchone()
-            if row and row[0] and os.path.exists(row[0]):
-                os.remove(row[0])
-            cur.execute("DELETE FROM records WHERE record_id = ?", (record_id,))
-            conn.commit()
-            conn.close()
+            with conn:
+                cur  = conn.cursor()
+                cur.execute("SELECT filepath FROM records WHERE record_id = ?", (record_id,))
+                row  = cur.fetchone()
+                if row and row[0] and os.path.exists(row[0]):
+                    os.remove(row[0])
+                cur.execute("DELETE FROM records WHERE record_id = ?", (record_id,))
             self._update_file_list()
             messagebox.showinfo("Success", f"{filename} deleted successfully.")
         except Exception as e:
@@ -535,6 +538,7 @@ class RecordsFrame(tk.Frame):
         super().__init__(parent, bg=BG_LIGHT)
         self.controller = controller
         self.role = role
+        self._file_list_after: Optional[str] = None
 
         ensure_records_table_exists()
         self._build_ui()
@@ -548,6 +552,14 @@ class RecordsFrame(tk.Frame):
         else:
             self.clinic_combo.set("No clinics found")
 
+    def destroy(self):
+        # The portal destroys this frame on navigation, which also deletes the
+        # Tcl command behind a pending _run_file_list; cancel it first.
+        if self._file_list_after:
+            self.after_cancel(self._file_list_after)
+            self._file_list_after = None
+        super().destroy()
+
     def _build_ui(self):
         outer = tk.Frame(self, bg=BG_LIGHT)
         outer.pack(fill="both", expand=True, padx=20, pady=20)
@@ -609,14 +621,6 @@ class RecordsFrame(tk.Frame):
                 "Records":   None,
                 "Billing":   "BillingMenuPage",
             }
-        def load_icon(path, size=(18, 20)):
-            try:
-                from PIL import Image, ImageTk
-                img = Image.open(path).resize(size, Image.LANCZOS)
-                return ImageTk.PhotoImage(img)
-            except Exception:
-                return None
-
         self._rec_nav_icons = {
             "Dashboard": load_icon("icons/dashboard_icon.png"),
             "Patient":   load_icon("icons/patient_icon.png"),
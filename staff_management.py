@@ -3,8 +3,14 @@ from tkinter import ttk, messagebox
 import sqlite3
 import os
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
-DB_NAME = "healthcare.db"
+from clinic_location import location_choices
+from database import (get_conn, create_staff_email_index,
+                      is_duplicate_email, STAFF_EMAIL_INDEX)
+from image_cache import load_icon
+from ui_constants import SEARCH_DEBOUNCE_MS
 
 # ---------- Dashboard color palette ----------
 BG_LIGHT         = "#e6f2ec"
@@ -35,26 +41,68 @@ ROLES = ["doctor", "billing", "records", "nurse"]
 CONFIRMATION_CODE = "1234"
 
 
-def hash_password(password: str, iterations: int = 200_000) -> str:
+# Single reusable worker for password hashing; hashlib.scrypt releases the GIL,
+# so the Tk thread keeps running while it works.
+_hash_pool = ThreadPoolExecutor(max_workers=1)
+
+
+def hash_password(password: str, n: int = 2**14, r: int = 8, p: int = 1) -> str:
+    # scrypt is memory-hard (128*r*n bytes, 16 MiB here), so GPU attackers
+    # lose most of the edge they have against PBKDF2 at similar CPU cost.
     salt = os.urandom(16)
-    dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
-    return f"pbkdf2_sha256${iterations}${salt.hex()}${dk.hex()}"
+    dk = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, dklen=32)
+    return f"scrypt${n}${r}${p}${salt.hex()}${dk.hex()}"
 
 
 def is_valid_email(s: str) -> bool:
-    import re
-    return bool(re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", s))
+    # local@domain.tld: one "@", no whitespace, a "." inside the domain
+    local, at, domain = s.partition("@")
+    return (bool(local) and bool(at) and "@" not in domain
+            and "." in domain[1:-1] and "".join(s.split()) == s)
 
 
 def is_valid_phone(s: str) -> bool:
-    import re
-    return bool(re.match(r"^\d{3}-\d{4}$", s))
+    # ###-####, ASCII digits only (str.isdecimal alone also accepts e.g. Arabic-Indic digits)
+    return (len(s) == 8 and s[3] == "-" and s.isascii()
+            and s[:3].isdecimal() and s[4:].isdecimal())
+
+
+_staff_indexes_ready = False
+
 
+def ensure_staff_indexes() -> None:
+    """Create the email index once per process; a blocked or failed attempt
+    is retried the next time the page is built."""
+    global _staff_indexes_ready
+    if _staff_indexes_ready:
+        return
+    try:
+        conn = get_conn()
+        with conn:
+            _staff_indexes_ready = create_staff_email_index(conn)
+    except sqlite3.Error:
+        pass
 
-def get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_NAME)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+
+INSERT_STAFF_SQL = """
+    INSERT INTO Staff (
+        first_name, last_name, email, phone, role, active_flag, password_hash
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# password_hash is bound as None when the password fields were left blank
+UPDATE_STAFF_SQL = """
+    UPDATE Staff SET
+        first_name=?, last_name=?, email=?, phone=?,
+        role=?, active_flag=?, password_hash=COALESCE(?, password_hash)
+    WHERE staff_id=?
+"""
+
+INSERT_ASSIGNMENT_SQL = """
+    INSERT INTO StaffLocationAssignment (
+        staff_id, location_id, assignment_role, start_date
+    ) VALUES (?, ?, ?, date('now'))
+"""
 
 
 class StaffManagementFrame(tk.Frame):
@@ -63,10 +111,13 @@ class StaffManagementFrame(tk.Frame):
         self.controller = controller
         self.role = role
         self.location_list = []
+        self.location_index = {}
         self._all_rows = []
         self._selected_staff_id = None
+        self._filter_after: Optional[str] = None
         self._total_var  = tk.StringVar(value="0")
         self._active_var = tk.StringVar(value="0")
+        ensure_staff_indexes()
         self._build_ui()
         self._load_locations()
         self._load_staff()
@@ -119,14 +170,6 @@ class StaffManagementFrame(tk.Frame):
         tk.Label(logo_box, text=f"CareFlow\n{portal_label}", bg=BG_SIDEBAR_LIGHT, fg=TEXT,
                  font=("Helvetica", 9, "bold"), justify="left", padx=8, pady=8).pack(anchor="w")
 
-        def load_icon(path, size=(18, 20)):
-            try:
-                from PIL import Image, ImageTk
-                img = Image.open(path).resize(size, Image.LANCZOS)
-                return ImageTk.PhotoImage(img)
-            except Exception:
-                return None
-
         self._staff_nav_icons = {
             "Dashboard": load_icon("icons/dashboard_icon.png"),
             "Patient":   load_icon("icons/patient_icon.png"),
@@ -196,7 +239,7 @@ class StaffManagementFrame(tk.Frame):
         tk.Label(search_frame, text="Search:", bg=BG_PANEL, fg=TEXT,
                  font=("Helvetica", 10, "bold")).pack(side="left", padx=(0, 6))
         self.search_var = tk.StringVar()
-        self.search_var.trace_add("write", lambda *_: self._filter_staff())
+        self.search_var.trace_add("write", lambda *_: self._queue_filter())
         tk.Entry(search_frame, textvariable=self.search_var, width=28,
                  font=FONT_SMALL, bg=CARD_BG, fg=TEXT, relief="flat",
                  highlightthickness=1, highlightbackground="#cde8dc",
@@ -225,7 +268,8 @@ class StaffManagementFrame(tk.Frame):
 
         # Treeview
         style = ttk.Style()
-        style.theme_use("clam")
+        if style.theme_use() != "clam":
+            style.theme_use("clam")
         style.configure("CareFlow.Treeview",
                         background=CARD_BG, fieldbackground=CARD_BG,
                         foreground=TEXT, rowheight=28, font=FONT_TABLE)
@@ -371,10 +415,12 @@ class StaffManagementFrame(tk.Frame):
             activeforeground="white", cursor="hand2"
         )
 
-        tk.Button(bar, text="＋  Add",       bg=BTN_SAFE,    activebackground=TEXT,
-                  command=self._do_add,                       **btn_cfg).pack(side="left", padx=(0, 6))
-        tk.Button(bar, text="✎  Update",     bg=BTN_INFO,    activebackground="#1a5276",
-                  command=self._do_update,                    **btn_cfg).pack(side="left", padx=(0, 6))
+        self.add_btn = tk.Button(bar, text="＋  Add",   bg=BTN_SAFE,    activebackground=TEXT,
+                                 command=self._do_add,       **btn_cfg)
+        self.add_btn.pack(side="left", padx=(0, 6))
+        self.update_btn = tk.Button(bar, text="✎  Update", bg=BTN_INFO, activebackground="#1a5276",
+                                    command=self._do_update,    **btn_cfg)
+        self.update_btn.pack(side="left", padx=(0, 6))
         tk.Button(bar, text="⏸  Deactivate", bg=BTN_WARN,    activebackground="#9a7d0a",
                   command=self._deactivate_selected,          **btn_cfg).pack(side="left", padx=(0, 6))
         tk.Button(bar, text="✕  Delete",     bg=BTN_DANGER,  activebackground="#922b21",
@@ -389,17 +435,10 @@ class StaffManagementFrame(tk.Frame):
     # ============================================================ Data ==
     def _load_locations(self):
         try:
-            conn = get_conn()
-            rows = conn.execute(
-                "SELECT location_id, name, status FROM ClinicLocation ORDER BY name"
-            ).fetchall()
-            conn.close()
-            self.location_list.clear()
+            self.location_list = list(location_choices())
+            self.location_index = {loc_id: i for i, (_, loc_id) in enumerate(self.location_list)}
             self.loc_listbox.delete(0, tk.END)
-            for loc_id, name, status in rows:
-                label = f"{name}  (ID {loc_id})" + (f" [{status}]" if status else "")
-                self.location_list.append((label, loc_id))
-                self.loc_listbox.insert(tk.END, label)
+            self.loc_listbox.insert(tk.END, *(label for label, _ in self.location_list))
         except sqlite3.Error as e:
             messagebox.showerror("DB Error", str(e))
 
@@ -420,7 +459,6 @@ class StaffManagementFrame(tk.Frame):
             ).fetchall()
             total  = conn.execute("SELECT COUNT(*) FROM Staff").fetchone()[0]
             active = conn.execute("SELECT COUNT(*) FROM Staff WHERE active_flag=1").fetchone()[0]
-            conn.close()
             self._all_rows = rows
             self._total_var.set(str(total))
             self._active_var.set(str(active))
@@ -439,6 +477,23 @@ class StaffManagementFrame(tk.Frame):
                                      email or "", phone or "", status),
                              tags=(tag,))
 
+    def _queue_filter(self):
+        """Rebuild the table once typing pauses rather than on every keystroke."""
+        if self._filter_after:
+            self.after_cancel(self._filter_after)
+        self._filter_after = self.after(SEARCH_DEBOUNCE_MS, self._run_filter)
+
+    def _run_filter(self):
+        self._filter_after = None
+        self._filter_staff()
+
+    def destroy(self):
+        """Drop a pending filter rebuild; its callback dies with the frame."""
+        if self._filter_after:
+            self.after_cancel(self._filter_after)
+            self._filter_after = None
+        super().destroy()
+
     def _filter_staff(self):
         term = self.search_var.get().lower()
         if not term:
@@ -470,7 +525,6 @@ class StaffManagementFrame(tk.Frame):
                 "SELECT location_id FROM StaffLocationAssignment "
                 "WHERE staff_id=? AND end_date IS NULL", (staff_id,)
             ).fetchall()}
-            conn.close()
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
             return
@@ -487,8 +541,9 @@ class StaffManagementFrame(tk.Frame):
         self.pw_confirm_entry.delete(0, tk.END)
         self.code_entry.delete(0, tk.END)
         self.loc_listbox.selection_clear(0, tk.END)
-        for i, (_, loc_id) in enumerate(self.location_list):
-            if loc_id in assigned_ids:
+        for loc_id in assigned_ids:
+            i = self.location_index.get(loc_id)
+            if i is not None:
                 self.loc_listbox.selection_set(i)
 
     # ======================================================== Form ops ==
@@ -511,14 +566,39 @@ class StaffManagementFrame(tk.Frame):
         self.code_entry.delete(0, tk.END)
         self.loc_listbox.selection_clear(0, tk.END)
         self._selected_staff_id = None
-        if self.tree.selection():
-            self.tree.selection_remove(self.tree.selection())
+        sel = self.tree.selection()
+        if sel:
+            self.tree.selection_remove(sel)
 
     # ======================================================== CRUD ==
+    def _hash_in_background(self, password, on_done):
+        """Run hash_password on a worker thread and pass the result to
+        on_done back on the Tk thread, so the window keeps repainting.
+        Add/Update stay disabled meanwhile so a double-click can't queue
+        a second hash and insert.
+
+        The poll runs on the toplevel so leaving the page mid-hash doesn't
+        take the timer with it; on_done still saves the record then."""
+        for btn in (self.add_btn, self.update_btn):
+            btn.config(state="disabled")
+        fut = _hash_pool.submit(hash_password, password)
+        root = self.winfo_toplevel()
+
+        def poll():
+            if not fut.done():
+                root.after(20, poll)
+                return
+            if self.winfo_exists():
+                for btn in (self.add_btn, self.update_btn):
+                    btn.config(state="normal")
+            on_done(fut.result())
+
+        root.after(20, poll)
+
     def _do_add(self):
-        data = self._collect_form()
-        if not self._validate_base(data):
+        if not self._validate_base():
             return
+        data = self._collect_form()
         if len(data["password"]) < 8:
             messagebox.showerror("Weak Password", "Password must be at least 8 characters.")
             return
@@ -528,40 +608,45 @@ class StaffManagementFrame(tk.Frame):
         if data["code"] != CONFIRMATION_CODE:
             messagebox.showerror("Invalid Code", "Invalid staff confirmation code.")
             return
-        pw_hash = hash_password(data["password"])
         selected_locs = [self.location_list[i][1] for i in self.loc_listbox.curselection()]
+        self._hash_in_background(
+            data["password"],
+            lambda pw_hash: self._finish_add(data, selected_locs, pw_hash))
+
+    def _finish_add(self, data, selected_locs, pw_hash):
         try:
             conn = get_conn()
-            cur = conn.execute(
-                "INSERT INTO Staff (first_name, last_name, email, phone, role, active_flag, password_hash) "
-                "VALUES (?,?,?,?,?,?,?)",
-                (data["first_name"], data["last_name"], data["email"], data["phone"],
-                 data["role"], data["active"], pw_hash)
-            )
-            new_id = cur.lastrowid
-            for loc_id in selected_locs:
-                conn.execute(
-                    "INSERT INTO StaffLocationAssignment "
-                    "(staff_id, location_id, assignment_role, start_date) VALUES (?,?,?,date('now'))",
-                    (new_id, loc_id, data["role"])
+            with conn:
+                cur = conn.execute(
+                    INSERT_STAFF_SQL,
+                    (data["first_name"], data["last_name"], data["email"], data["phone"],
+                     data["role"], data["active"], pw_hash)
+                )
+                new_id = cur.lastrowid
+                conn.executemany(
+                    INSERT_ASSIGNMENT_SQL,
+                    [(new_id, loc_id, data["role"]) for loc_id in selected_locs]
                 )
-            conn.commit()
-            conn.close()
         except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Could not add staff.\n\n{e}")
+            if is_duplicate_email(e, STAFF_EMAIL_INDEX):
+                messagebox.showerror("Duplicate Email", "Email already registered.")
+            else:
+                messagebox.showerror("Database Error", f"Could not add staff.\n\n{e}")
             return
         messagebox.showinfo("Success",
                             f"Staff member {data['first_name']} {data['last_name']} added.")
-        self._clear_form()
-        self._load_staff()
+        if self.winfo_exists():
+            self._clear_form()
+            self._load_staff()
 
     def _do_update(self):
         if not self._selected_staff_id:
             messagebox.showwarning("Select", "Please select a staff member first.")
             return
-        data = self._collect_form()
-        if not self._validate_base(data):
+        if not self._validate_base():
             return
+        data = self._collect_form()
+        staff_id = self._selected_staff_id
         new_loc_ids = {self.location_list[i][1] for i in self.loc_listbox.curselection()}
         pw = data["password"]
         if pw or data["confirm_password"]:
@@ -574,43 +659,43 @@ class StaffManagementFrame(tk.Frame):
             if data["code"] != CONFIRMATION_CODE:
                 messagebox.showerror("Invalid Code", "Invalid staff confirmation code.")
                 return
-            pw_hash = hash_password(pw)
-            sql    = ("UPDATE Staff SET first_name=?, last_name=?, email=?, phone=?, "
-                      "role=?, active_flag=?, password_hash=? WHERE staff_id=?")
-            params = (data["first_name"], data["last_name"], data["email"], data["phone"],
-                      data["role"], data["active"], pw_hash, self._selected_staff_id)
+            self._hash_in_background(
+                pw, lambda pw_hash: self._finish_update(staff_id, data, new_loc_ids, pw_hash))
         else:
-            sql    = ("UPDATE Staff SET first_name=?, last_name=?, email=?, phone=?, "
-                      "role=?, active_flag=? WHERE staff_id=?")
-            params = (data["first_name"], data["last_name"], data["email"], data["phone"],
-                      data["role"], data["active"], self._selected_staff_id)
+            self._finish_update(staff_id, data, new_loc_ids, None)
+
+    def _finish_update(self, staff_id, data, new_loc_ids, pw_hash):
         try:
             conn = get_conn()
-            conn.execute(sql, params)
-            current_locs = {r[0] for r in conn.execute(
-                "SELECT location_id FROM StaffLocationAssignment "
-                "WHERE staff_id=? AND end_date IS NULL", (self._selected_staff_id,)
-            ).fetchall()}
-            for loc_id in new_loc_ids - current_locs:
+            with conn:
                 conn.execute(
-                    "INSERT INTO StaffLocationAssignment "
-                    "(staff_id, location_id, assignment_role, start_date) VALUES (?,?,?,date('now'))",
-                    (self._selected_staff_id, loc_id, data["role"])
+                    UPDATE_STAFF_SQL,
+                    (data["first_name"], data["last_name"], data["email"], data["phone"],
+                     data["role"], data["active"], pw_hash, staff_id)
                 )
-            for loc_id in current_locs - new_loc_ids:
-                conn.execute(
+                current_locs = {r[0] for r in conn.execute(
+                    "SELECT location_id FROM StaffLocationAssignment "
+                    "WHERE staff_id=? AND end_date IS NULL", (staff_id,)
+                ).fetchall()}
+                conn.executemany(
+                    INSERT_ASSIGNMENT_SQL,
+                    [(staff_id, loc_id, data["role"]) for loc_id in new_loc_ids - current_locs]
+                )
+                conn.executemany(
                     "UPDATE StaffLocationAssignment SET end_date=date('now') "
                     "WHERE staff_id=? AND location_id=? AND end_date IS NULL",
-                    (self._selected_staff_id, loc_id)
+                    [(staff_id, loc_id) for loc_id in current_locs - new_loc_ids]
                 )
-            conn.commit()
-            conn.close()
         except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Could not update staff.\n\n{e}")
+            if is_duplicate_email(e, STAFF_EMAIL_INDEX):
+                messagebox.showerror("Duplicate Email", "Email already registered.")
+            else:
+                messagebox.showerror("Database Error", f"Could not update staff.\n\n{e}")
             return
         messagebox.showinfo("Success", "Staff information updated.")
-        self._clear_form()
-        self._load_staff()
+        if self.winfo_exists():
+            self._clear_form()
+            self._load_staff()
 
     def _deactivate_selected(self):
         if not self._selected_staff_id:
@@ -622,10 +707,9 @@ class StaffManagementFrame(tk.Frame):
             return
         try:
             conn = get_conn()
-            conn.execute("UPDATE Staff SET active_flag=0 WHERE staff_id=?",
-                         (self._selected_staff_id,))
-            conn.commit()
-            conn.close()
+            with conn:
+                conn.execute("UPDATE Staff SET active_flag=0 WHERE staff_id=?",
+                             (self._selected_staff_id,))
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Could not deactivate staff.\n\n{e}")
             return
@@ -643,12 +727,11 @@ class StaffManagementFrame(tk.Frame):
             return
         try:
             conn = get_conn()
-            conn.execute("DELETE FROM StaffLocationAssignment WHERE staff_id=?",
-                         (self._selected_staff_id,))
-            conn.execute("DELETE FROM Staff WHERE staff_id=?",
-                         (self._selected_staff_id,))
-            conn.commit()
-            conn.close()
+            with conn:
+                conn.execute("DELETE FROM StaffLocationAssignment WHERE staff_id=?",
+                             (self._selected_staff_id,))
+                conn.execute("DELETE FROM Staff WHERE staff_id=?",
+                             (self._selected_staff_id,))
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Could not delete staff.\n\n{e}")
             return
@@ -663,24 +746,37 @@ class StaffManagementFrame(tk.Frame):
             row = conn.execute(
                 "SELECT first_name, last_name FROM Staff WHERE staff_id=?", (staff_id,)
             ).fetchone()
-            conn.close()
             return f"{row[0]} {row[1]}" if row else f"ID {staff_id}"
         except sqlite3.Error:
             return f"ID {staff_id}"
 
-    def _validate_base(self, data):
-        required = ["first_name", "last_name", "email", "phone", "role"]
-        missing  = [k for k in required if not data.get(k)]
+    # Format checks run in order after the required-field check:
+    # (key, validator, dialog title, message)
+    _VALIDATORS = (
+        ("email", is_valid_email, "Invalid Email", "Enter a valid email (e.g. alice@clinic.com)."),
+        ("phone", is_valid_phone, "Invalid Phone", "Phone must be ###-#### (e.g. 555-1234)."),
+    )
+
+    def _validate_base(self):
+        # Read the required widgets directly so a blank submit is rejected
+        # before _collect_form touches the rest of the form.
+        values, missing = {}, []
+        for key in ("first_name", "last_name", "email", "phone"):
+            val = self.entries[key].get()
+            if not val or not val.strip():
+                missing.append(key)
+                continue
+            values[key] = val.strip()
+        if not self.role_var.get().strip():
+            missing.append("role")
         if missing:
             messagebox.showerror("Missing Fields",
                                  "Missing: " + ", ".join(m.replace("_", " ") for m in missing))
             return False
-        if not is_valid_email(data["email"]):
-            messagebox.showerror("Invalid Email", "Enter a valid email (e.g. alice@clinic.com).")
-            return False
-        if not is_valid_phone(data["phone"]):
-            messagebox.showerror("Invalid Phone", "Phone must be ###-#### (e.g. 555-1234).")
-            return False
+        for key, check, title, msg in self._VALIDATORS:
+            if not check(values[key]):
+                messagebox.showerror(title, msg)
+                return False
         return True
 
 
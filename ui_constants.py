@@ -0,0 +1,9 @@
+"""
+ui_constants.py
+
+Behaviour settings shared by the CareFlow pages, kept in one place so the
+pages cannot drift apart.
+"""
+
+# How long a search box waits after the last keystroke before re-querying.
+SEARCH_DEBOUNCE_MS = 200